@@ -2,17 +2,26 @@ import streamlit as st
 import pandas as pd
 import fitz  # PyMuPDF
 import re
-import pdfplumber
+import html
+import hashlib
 import os
+import sys
+import multiprocessing
 import tempfile
-from collections import Counter
-from openpyxl import Workbook
-from openpyxl.styles import PatternFill, Font, Alignment
-import pytesseract
-from pdf2image import convert_from_path
-import base64
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+import xlsxwriter
+import io
 import uuid
 
+# One single-threaded tesseract per OCR worker process performs better than
+# several multi-threaded ones competing for the same cores
+os.environ["OMP_THREAD_LIMIT"] = "1"
+
+# Bump whenever PDF extraction changes so previously cached results are not reused
+EXTRACTION_VERSION = 1
+
 # Streamlit page configuration
 st.set_page_config(page_title="Component Analyzer", layout="wide")
 
@@ -44,18 +53,37 @@ def validate_file(file, expected_ext):
         return False
     return True
 
+# Function to normalize a component token; cached and interned so repeated
+# tokens share one string object
+@lru_cache(maxsize=None)
+def normalize_component(token):
+    return sys.intern(token.strip().upper())
+
+# Function to build a regex alternation of prefixes, longest first so e.g. 'LED' wins over 'L'
+def prefix_alternation(prefixes):
+    return '|'.join(map(re.escape, sorted(prefixes, key=len, reverse=True)))
+
+# Raised when PDF extraction hit an error, carrying the partial results so
+# they can be shown without being cached
+class PdfExtractionError(Exception):
+    def __init__(self, components, errors):
+        super().__init__("; ".join(errors))
+        self.components = components
+        self.errors = errors
+
 # Proceed only if both files are uploaded
 if excel_file and pdf_file:
     if not (validate_file(excel_file, '.xlsx') and validate_file(pdf_file, '.pdf')):
         st.stop()
 
-    # Create temporary files for processing
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_excel:
-        tmp_excel.write(excel_file.read())
-        input_excel_file = tmp_excel.name
+    # Stream the PDF to a temporary file in 1 MiB chunks, hashing it on the way
+    pdf_hasher = hashlib.blake2b(digest_size=16)
     with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_pdf:
-        tmp_pdf.write(pdf_file.read())
+        for chunk in iter(lambda: pdf_file.read(1024 * 1024), b''):
+            pdf_hasher.update(chunk)
+            tmp_pdf.write(chunk)
         input_pdf_file = tmp_pdf.name
+    pdf_hash = pdf_hasher.hexdigest()
 
     # Generate output file paths
     base_name = os.path.splitext(excel_file.name)[0]
@@ -63,9 +91,9 @@ if excel_file and pdf_file:
     output_pdf_file = f"{base_name}_combined.pdf"
     output_report_file = f"{base_name}_detailed_report.xlsx"
 
-    # Read Excel file
+    # Read only the Excel header row for column selection; the full sheet is loaded on processing
     try:
-        df = pd.read_excel(input_excel_file, engine='openpyxl')
+        df = pd.read_excel(excel_file, engine='openpyxl', nrows=0)
     except Exception as e:
         st.error(f"Error reading Excel file: {e}")
         st.stop()
@@ -96,95 +124,132 @@ if excel_file and pdf_file:
     else:
         valid_prefixes = default_prefixes
 
-    single_letter_prefixes = [p for p in valid_prefixes if len(p) == 1]
-    multi_letter_prefixes = [p for p in valid_prefixes if len(p) > 1]
+    # Compile component patterns once per run
+    filter_re = re.compile(r'^(?:[A-Z][0-9]+|(?:' + prefix_alternation(valid_prefixes) + r')[0-9]+)$')
+    non_alnum_re = re.compile(r'[^A-Za-z0-9\n]')
+
+    # pdfplumber is much slower than PyMuPDF, so its fallback is opt-in
+    enable_plumber_fallback = st.checkbox(
+        "Enable slow pdfplumber fallback",
+        value=False,
+        help="Retry with pdfplumber when neither PyMuPDF nor OCR finds any components."
+    )
 
     # Process button
     if st.button("Process Files"):
         with st.spinner("Processing files..."):
-            # Process Excel data
-            expanded_rows = []
-            for _, row in df.iterrows():
-                components = set()
-                for col in component_columns:
-                    if pd.notna(row[col]) and row[col].strip():
-                        comps = [comp.strip().upper() for comp in str(row[col]).split(',') if comp.strip()]
-                        components.update(comps)
-                
-                if components:
-                    for component in sorted(components):
-                        new_row = row.copy()
-                        new_row['Merged Components'] = component
-                        expanded_rows.append(new_row)
-                else:
-                    new_row = row.copy()
-                    new_row['Merged Components'] = ''
-                    expanded_rows.append(new_row)
-
-            # Create new DataFrame
-            new_df = pd.DataFrame(expanded_rows)
-            columns = list(df.columns) + ['Merged Components']
-            new_df = new_df[columns]
-
-            # Save modified Excel
+            # Read Excel file, loading component columns as strings
             try:
-                new_df.to_excel(output_excel_file, index=False, engine='openpyxl')
+                excel_file.seek(0)
+                df = pd.read_excel(excel_file, engine='openpyxl', dtype={col: str for col in component_columns})
             except Exception as e:
-                st.error(f"Error saving modified Excel file: {e}")
+                st.error(f"Error reading Excel file: {e}")
                 st.stop()
 
-            # Read modified Excel
-            try:
-                df = pd.read_excel(output_excel_file, engine='openpyxl')
-            except Exception as e:
-                st.error(f"Error reading modified Excel file: {e}")
-                st.stop()
+            # Process Excel data: union the comma-separated components of each row
+            merged = pd.Series([set() for _ in range(len(df))], index=df.index, dtype=object)
+            for col in component_columns:
+                parts = df[col].fillna('').str.split(',').apply(
+                    lambda items: {comp for comp in map(normalize_component, items) if comp}
+                )
+                merged = merged.combine(parts, lambda a, b: a | b)
+
+            # Create new DataFrame with one row per component
+            new_df = df.copy()
+            new_df['Merged Components'] = merged.apply(sorted)
+            new_df = new_df.explode('Merged Components')
+            new_df['Merged Components'] = new_df['Merged Components'].fillna('')
+            columns = list(df.columns) + ['Merged Components']
+            new_df = new_df[columns]
 
             # Extract components from Excel
-            excel_components = set()
-            excel_counts = Counter()
-            for item in df['Merged Components'].dropna().astype(str):
-                components = [comp.strip().upper() for comp in item.split(",") if comp.strip()]
-                excel_components.update(components)
-                excel_counts.update(components)
+            excel_counts = Counter(
+                comp
+                for item in new_df['Merged Components'].dropna().astype(str)
+                for comp in map(normalize_component, item.split(","))
+                if comp
+            )
+            excel_components = set(excel_counts)
 
             # Extract components from PDF
-            def extract_components_from_pdf(doc, valid_prefixes):
+            def extract_components_from_pdf(doc, valid_prefixes, use_plumber=False):
                 components = []
-                for page_num, page in enumerate(doc, 1):
-                    words = page.get_text("words")
-                    for word_tuple in words:
-                        word = re.sub(r'[^A-Za-z0-9]', '', word_tuple[4].strip()).upper()
-                        if any(word.startswith(prefix) for prefix in valid_prefixes):
-                            if any(re.match(r'^' + prefix + r'[0-9]+$', word) for prefix in single_letter_prefixes):
-                                components.append((word, page_num, word_tuple))
-                            elif any(re.match(r'^' + prefix + r'[0-9]+$', word) for prefix in multi_letter_prefixes):
-                                components.append((word, page_num, word_tuple))
+                errors = []
+                alternation = prefix_alternation(valid_prefixes)
+                prefix_re = re.compile(r'^(?:' + alternation + r')[0-9]+$', re.MULTILINE)
+                prefix_search_re = re.compile(r'(?:' + alternation + r')[0-9]+')
+                pages_words = [page.get_text("words") for page in doc]
+
+                # Normalize a page's words as one newline-joined string and classify them
+                # with a single multiline regex scan, mapping matches back to word tuples
+                for page_num, words in enumerate(pages_words, 1):
+                    text = non_alnum_re.sub('', '\n'.join(word_tuple[4] for word_tuple in words)).upper()
+                    word_index, pos = 0, 0
+                    for match in prefix_re.finditer(text):
+                        word_index += text.count('\n', pos, match.start())
+                        pos = match.start()
+                        components.append((sys.intern(match.group()), page_num, words[word_index]))
                 
-                # Try OCR if no components found
-                if not components:
+                # Try OCR on pages without embedded text, or on every page if the embedded
+                # text held no components (e.g. a raster circuit with a vector title block)
+                if components:
+                    ocr_pages = [page_num for page_num, words in enumerate(pages_words, 1) if not words]
+                else:
+                    ocr_pages = list(range(1, len(pages_words) + 1))
+                if ocr_pages:
                     try:
-                        images = convert_from_path(doc.name)
-                        for page_num, image in enumerate(images, 1):
-                            text = pytesseract.image_to_string(image).upper()
-                            for word in re.findall(r'(?:[A-Z][0-9]+|(?:' + '|'.join(multi_letter_prefixes) + r')[0-9]+)', text):
-                                if any(word.startswith(prefix) for prefix in valid_prefixes):
-                                    components.append((word, page_num, None))
+                        import pytesseract
+                        from pdf2image import convert_from_path
+
+                        # Render pages to files on disk so memory stays bounded; tesseract reads the paths
+                        def rasterize_page(page_num, image_dir, dpi=150):
+                            return convert_from_path(
+                                doc.name, dpi=dpi, first_page=page_num, last_page=page_num,
+                                output_folder=image_dir, fmt='jpeg', paths_only=True
+                            )[0]
+
+                        # Sparse-text segmentation suits scattered schematic labels
+                        ocr_page = partial(pytesseract.image_to_string, config='--psm 11 --oem 1')
+
+                        with tempfile.TemporaryDirectory() as image_dir, \
+                                ThreadPoolExecutor(max_workers=os.cpu_count()) as executor, \
+                                multiprocessing.Pool(os.cpu_count()) as pool:
+                            images = list(executor.map(partial(rasterize_page, image_dir=image_dir), ocr_pages))
+                            texts = {page_num: text.upper() for page_num, text in zip(ocr_pages, pool.map(ocr_page, images))}
+
+                            # Retry pages without any match at a higher resolution
+                            retry_pages = [page_num for page_num in ocr_pages if not prefix_search_re.search(texts[page_num])]
+                            if retry_pages:
+                                images = list(executor.map(partial(rasterize_page, image_dir=image_dir, dpi=300), retry_pages))
+                                texts.update((page_num, text.upper()) for page_num, text in zip(retry_pages, pool.map(ocr_page, images)))
+
+                        for page_num in ocr_pages:
+                            for word in prefix_search_re.findall(texts[page_num]):
+                                components.append((word, page_num, None))
                     except Exception as e:
-                        st.warning(f"OCR error: {e}")
+                        errors.append(f"OCR error: {e}")
 
-                # Try pdfplumber if still no components
-                if not components:
+                # Try pdfplumber if enabled and still no components
+                if use_plumber and not components:
                     try:
+                        import pdfplumber
                         with pdfplumber.open(doc.name) as pdf:
                             for page_num, page in enumerate(pdf.pages, 1):
-                                text = page.extract_text().upper() if page.extract_text() else ""
-                                for word in re.findall(r'(?:[A-Z][0-9]+|(?:' + '|'.join(multi_letter_prefixes) + r')[0-9]+)', text):
-                                    if any(word.startswith(prefix) for prefix in valid_prefixes):
-                                        components.append((word, page_num, None))
+                                text = (page.extract_text() or "").upper()
+                                for word in prefix_search_re.findall(text):
+                                    components.append((word, page_num, None))
                     except Exception as e:
-                        st.warning(f"pdfplumber error: {e}")
+                        errors.append(f"pdfplumber error: {e}")
                 
+                return components, errors
+
+            # Cache extraction results by file hash so identical uploads skip re-extraction;
+            # raising on errors keeps failed or partial results out of the cache
+            @st.cache_data(show_spinner=False, max_entries=32, ttl=24 * 60 * 60)
+            def extract_components_cached(pdf_hash, prefixes, use_plumber, version):
+                components, errors = extract_components_from_pdf(doc, prefixes, use_plumber)
+                if errors:
+                    raise PdfExtractionError(components, errors)
                 return components
 
             # Open PDF
@@ -195,9 +260,16 @@ if excel_file and pdf_file:
                 st.stop()
 
             # Extract PDF components
-            pdf_components_list = extract_components_from_pdf(doc, valid_prefixes)
-            pdf_components = set(comp[0] for comp in pdf_components_list)
+            try:
+                pdf_components_list = extract_components_cached(
+                    pdf_hash, tuple(sorted(valid_prefixes)), enable_plumber_fallback, EXTRACTION_VERSION
+                )
+            except PdfExtractionError as e:
+                for error in e.errors:
+                    st.warning(error)
+                pdf_components_list = e.components
             pdf_counts = Counter(comp[0] for comp in pdf_components_list)
+            pdf_components = set(pdf_counts)
 
             # Analyze conditions
             repeated_pdf = {comp for comp, count in pdf_counts.items() if count > 1}
@@ -206,7 +278,7 @@ if excel_file and pdf_file:
             in_excel_not_pdf = excel_components - pdf_components
 
             def filter_components(components):
-                return {comp for comp in components if re.match(r'^(?:[A-Z][0-9]+|(?:' + '|'.join(valid_prefixes) + r')[0-9]+)$', comp.upper())}
+                return {comp for comp in components if filter_re.match(comp.upper())}
 
             repeated_pdf = filter_components(repeated_pdf)
             repeated_excel = filter_components(repeated_excel)
@@ -215,62 +287,74 @@ if excel_file and pdf_file:
 
             # Highlight components in PDF
             def highlight_components(doc, pdf_components_list, repeated_pdf, repeated_excel, in_pdf_not_excel, in_excel_not_pdf):
+                # Resolve each component's color once, in the same priority order as before:
+                # yellow (PDF only), blue (Excel only), red (repeated in PDF), cyan (repeated in Excel)
+                color_of = {}
+                for comp in repeated_excel:
+                    color_of[comp] = (0, 1, 1)  # Cyan
+                for comp in repeated_pdf:
+                    color_of[comp] = (1, 0, 0)  # Red
+                for comp in in_excel_not_pdf:
+                    color_of[comp] = (0, 0, 1)  # Blue
+                for comp in in_pdf_not_excel:
+                    color_of[comp] = (1, 1, 0)  # Yellow
+
+                # Group highlight rectangles by page and color so each group is one annotation
+                rects_by_page = defaultdict(lambda: defaultdict(list))
                 for word, page_num, word_tuple in pdf_components_list:
                     if not word_tuple:
                         continue
-                    page = doc[page_num - 1]
-                    rect = fitz.Rect(word_tuple[0], word_tuple[1], word_tuple[2], word_tuple[3])
-                    rect.x0 -= 2
-                    rect.x1 += 2
-                    rect.y0 -= 2
-                    rect.y1 += 2
-                    
-                    if word in in_pdf_not_excel:
-                        color = (1, 1, 0)  # Yellow
-                    elif word in in_excel_not_pdf:
-                        color = (0, 0, 1)  # Blue
-                    elif word in repeated_pdf:
-                        color = (1, 0, 0)  # Red
-                    elif word in repeated_excel:
-                        color = (0, 1, 1)  # Cyan
-                    else:
-                        color = (0, 1, 0)  # Green
-                    
-                    highlight = page.add_highlight_annot(rect)
-                    highlight.set_colors(stroke=color)
-                    highlight.set_opacity(0.5)
-                    highlight.update()
+                    x0, y0, x1, y1 = word_tuple[:4]
+                    color = color_of.get(word, (0, 1, 0))  # Green if no condition applies
+                    rects_by_page[page_num - 1][color].append((x0 - 2, y0 - 2, x1 + 2, y1 + 2))
+
+                for page_index, rects_by_color in rects_by_page.items():
+                    page = doc[page_index]
+                    for color, rects in rects_by_color.items():
+                        highlight = page.add_highlight_annot(rects)
+                        highlight.set_colors(stroke=color)
+                        highlight.set_opacity(0.5)
+                        highlight.update()
 
             highlight_components(doc, pdf_components_list, repeated_pdf, repeated_excel, in_pdf_not_excel, in_excel_not_pdf)
 
-            # Add summary page to PDF
-            page = doc.new_page()
-            text = (
-                "Component Analysis Summary (All Pages)\n\n"
-                f"Repeated in PDF ({len(repeated_pdf)}):\n{', '.join(sorted(repeated_pdf)) or 'None'}\n\n"
-                f"Repeated in Excel ({len(repeated_excel)}):\n{', '.join(sorted(repeated_excel)) or 'None'}\n\n"
-                f"Present in PDF, not in Excel ({len(in_pdf_not_excel)}):\n{', '.join(sorted(in_pdf_not_excel)) or 'None'}\n\n"
-                f"Present in Excel, not in PDF ({len(in_excel_not_pdf)}):\n{', '.join(sorted(in_excel_not_pdf)) or 'None'}"
-            )
-            page.insert_text(
-                fitz.Point(50, 50),
-                text,
-                fontname="helv",
-                fontsize=10,
-                color=(0, 0, 0)
+            # Add summary pages to PDF, laid out and paginated by a fitz.Story
+            summary_html = "<h3>Component Analysis Summary (All Pages)</h3>" + "".join(
+                f"<p><b>{title} ({len(comps)}):</b><br>{html.escape(', '.join(sorted(comps))) or 'None'}</p>"
+                for title, comps in [
+                    ("Repeated in PDF", repeated_pdf),
+                    ("Repeated in Excel", repeated_excel),
+                    ("Present in PDF, not in Excel", in_pdf_not_excel),
+                    ("Present in Excel, not in PDF", in_excel_not_pdf)
+                ]
             )
+            story = fitz.Story(html=summary_html, user_css="body {font-family: sans-serif; font-size: 10pt;}")
+            mediabox = fitz.paper_rect("a4")
+            where = mediabox + (50, 50, -50, -50)
+            summary_buffer = io.BytesIO()
+            writer = fitz.DocumentWriter(summary_buffer)
+            more = True
+            while more:
+                device = writer.begin_page(mediabox)
+                more, _ = story.place(where)
+                story.draw(device)
+                writer.end_page()
+            writer.close()
+            with fitz.open("pdf", summary_buffer.getvalue()) as summary_doc:
+                doc.insert_pdf(summary_doc)
 
             # Save modified PDF
             try:
-                doc.save(output_pdf_file)
+                pdf_buffer = io.BytesIO()
+                doc.save(pdf_buffer)
                 doc.close()
             except Exception as e:
                 st.error(f"Error saving PDF: {e}")
                 st.stop()
 
-            # Generate detailed report
-            wb = Workbook()
-            wb.remove(wb.active)
+            # Generate detailed report, streaming rows with xlsxwriter
+            report_buffer = io.BytesIO()
+            wb = xlsxwriter.Workbook(report_buffer, {'constant_memory': True})
             conditions = {
                 'repeated_pdf': ('Repeated in PDF', 'Red', (1, 0, 0)),
                 'repeated_excel': ('Repeated in Excel', 'Cyan', (0, 1, 1)),
@@ -278,12 +362,13 @@ if excel_file and pdf_file:
                 'in_excel_not_pdf': ('In Excel, not in PDF', 'Blue', (0, 0, 1)),
                 'normal': ('Normal', 'Green', (0, 1, 0))
             }
+            header_format = wb.add_format({'bold': True, 'align': 'center'})
             fills = {
-                'repeated_pdf': PatternFill(start_color='FFFF0000', end_color='FFFF0000', fill_type='solid'),
-                'repeated_excel': PatternFill(start_color='FF00FFFF', end_color='FF00FFFF', fill_type='solid'),
-                'in_pdf_not_excel': PatternFill(start_color='FFFFFF00', end_color='FFFFFF00', fill_type='solid'),
-                'in_excel_not_pdf': PatternFill(start_color='FF0000FF', end_color='FF0000FF', fill_type='solid'),
-                'normal': PatternFill(start_color='FF00FF00', end_color='FF00FF00', fill_type='solid')
+                'repeated_pdf': wb.add_format({'bg_color': '#FF0000', 'pattern': 1}),
+                'repeated_excel': wb.add_format({'bg_color': '#00FFFF', 'pattern': 1}),
+                'in_pdf_not_excel': wb.add_format({'bg_color': '#FFFF00', 'pattern': 1}),
+                'in_excel_not_pdf': wb.add_format({'bg_color': '#0000FF', 'pattern': 1}),
+                'normal': wb.add_format({'bg_color': '#00FF00', 'pattern': 1})
             }
             condition_components = {
                 'repeated_pdf': repeated_pdf,
@@ -294,48 +379,39 @@ if excel_file and pdf_file:
             }
 
             for condition_key, (condition_name, color_name, _) in conditions.items():
-                ws = wb.create_sheet(title=condition_name)
+                ws = wb.add_worksheet(condition_name)
                 headers = ["Condition", "Component", "Number of Times Repeated", "Highlight Color"]
-                for col, header in enumerate(headers, 1):
-                    cell = ws.cell(row=1, column=col)
-                    cell.value = header
-                    cell.font = Font(bold=True)
-                    cell.alignment = Alignment(horizontal='center')
-                
+                ws.write_row(0, 0, headers, header_format)
+                widths = [len(header) for header in headers]
+
                 components = sorted(condition_components[condition_key])
-                row = 2
-                for comp in components:
+                for row, comp in enumerate(components, 1):
                     repeat_count = (
                         pdf_counts.get(comp, 0) if condition_key in ['repeated_pdf', 'in_pdf_not_excel'] else
                         excel_counts.get(comp, 0) if condition_key in ['repeated_excel', 'in_excel_not_pdf'] else
                         max(pdf_counts.get(comp, 0), excel_counts.get(comp, 0))
                     )
-                    ws.cell(row=row, column=1).value = condition_name
-                    ws.cell(row=row, column=2).value = comp
-                    ws.cell(row=row, column=3).value = repeat_count
-                    ws.cell(row=row, column=4).value = color_name
-                    for col in range(1, 5):
-                        ws.cell(row=row, column=col).fill = fills[condition_key]
-                    row += 1
-                
-                for col in ws.columns:
-                    max_length = 0
-                    column = col[0].column_letter
-                    for cell in col:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = max_length + 2
-                    ws.column_dimensions[column].width = adjusted_width
+                    values = [condition_name, comp, repeat_count, color_name]
+                    ws.write_row(row, 0, values, fills[condition_key])
+                    widths = [max(width, len(str(value))) for width, value in zip(widths, values)]
+
+                for col, width in enumerate(widths):
+                    ws.set_column(col, col, width + 2)
 
             try:
-                wb.save(output_report_file)
+                wb.close()
             except Exception as e:
                 st.error(f"Error generating report: {e}")
                 st.stop()
 
+            # Save modified Excel
+            try:
+                excel_buffer = io.BytesIO()
+                new_df.to_excel(excel_buffer, index=False, engine='openpyxl')
+            except Exception as e:
+                st.error(f"Error saving modified Excel file: {e}")
+                st.stop()
+
             # Display summary
             st.header("Analysis Summary")
             st.write(f"**Repeated in PDF**: {len(repeated_pdf)} components")
@@ -343,25 +419,25 @@ if excel_file and pdf_file:
             st.write(f"**In PDF, not in Excel**: {len(in_pdf_not_excel)} components")
             st.write(f"**In Excel, not in PDF**: {len(in_excel_not_pdf)} components")
 
-            # Provide download links
+            # Provide download buttons
             st.header("Download Output Files")
-            for file_path, label in [
-                (output_excel_file, "Modified Excel File"),
-                (output_pdf_file, "Highlighted PDF"),
-                (output_report_file, "Detailed Report")
+            xlsx_mime = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            for buffer, file_name, label, mime in [
+                (excel_buffer, output_excel_file, "Modified Excel File", xlsx_mime),
+                (pdf_buffer, output_pdf_file, "Highlighted PDF", "application/pdf"),
+                (report_buffer, output_report_file, "Detailed Report", xlsx_mime)
             ]:
-                with open(file_path, "rb") as f:
-                    file_data = f.read()
-                b64 = base64.b64encode(file_data).decode()
-                href = f'<a href="data:application/octet-stream;base64,{b64}" download="{os.path.basename(file_path)}">Download {label}</a>'
-                st.markdown(href, unsafe_allow_html=True)
+                # on_click="ignore" keeps the results on screen instead of rerunning the app
+                st.download_button(
+                    f"Download {label}",
+                    buffer.getvalue(),
+                    file_name=file_name,
+                    mime=mime,
+                    on_click="ignore"
+                )
 
             # Clean up temporary files
-            os.unlink(input_excel_file)
             os.unlink(input_pdf_file)
-            for file in [output_excel_file, output_pdf_file, output_report_file]:
-                if os.path.exists(file):
-                    os.unlink(file)
 
 else:
     st.info("Please upload both an Excel file and a PDF file to proceed.")